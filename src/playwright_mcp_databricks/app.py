@@ -4,21 +4,88 @@ FastAPI application for Playwright MCP Server on Databricks Apps.
 This module wraps the Node.js based Playwright MCP server and exposes it
 via FastAPI with streamable HTTP transport for use on Databricks Apps.
 """
-import subprocess
 import asyncio
+import ctypes
+import hashlib
+import itertools
+import json
+import logging
 import os
+import signal
+import sys
+import uuid
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import AsyncIterator
 
 from fastapi import FastAPI, Request
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import Response, StreamingResponse
+from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from mcp.server.session import ServerSession
 from mcp.server.sse import SseServerTransport
 
+logger = logging.getLogger(__name__)
+
 # Get the static directory path
 STATIC_DIR = Path(__file__).parent / "static"
 
+# The landing page only changes between deploys, so keep it in memory
+INDEX_BYTES = (STATIC_DIR / "index.html").read_bytes()
+INDEX_ETAG = '"%s"' % hashlib.md5(INDEX_BYTES, usedforsecurity=False).hexdigest()
+INDEX_HEADERS = {"ETag": INDEX_ETAG, "Cache-Control": "public, max-age=3600"}
+
+# Health probes are frequent; serialize their constant body once
+HEALTH_BODY = json.dumps({"status": "healthy", "service": "playwright-mcp-server"}).encode()
+
+# Buffer limit for the MCP server's stdout reader. Frames carrying
+# screenshots or DOM snapshots are large, so read them in big chunks.
+MCP_STREAM_LIMIT = 1024 * 1024
+
+# SSE events are coalesced into one write of up to SSE_FLUSH_BYTES, or
+# whatever has arrived within SSE_FLUSH_INTERVAL seconds of the first event.
+SSE_FLUSH_BYTES = 64 * 1024
+SSE_FLUSH_INTERVAL = 0.005
+
+# Bytes of frames buffered per session. Past this, notifications for the
+# session are dropped; responses and server requests are always kept.
+SESSION_QUEUE_BYTES = 8 * 1024 * 1024
+
+# Seconds a session may stay over SESSION_QUEUE_BYTES before it is ended,
+# so a client that stops reading cannot pin memory forever
+SESSION_FULL_GRACE = 30.0
+
+# Error sent for requests still open when their session is ended
+SESSION_ENDED = "MCP session ended before the server responded"
+
+# Idle streams get an SSE comment this often so proxies and the Databricks
+# Apps ingress do not close them for inactivity
+SSE_KEEPALIVE_INTERVAL = 15.0
+SSE_KEEPALIVE = b": keepalive\n\n"
+
+# Seconds between client disconnect checks on open streams
+DISCONNECT_POLL_INTERVAL = 1.0
+
+# Seconds the MCP server and its browsers get to exit after SIGTERM
+# before they are killed
+MCP_SHUTDOWN_GRACE = 2.0
+
+# prctl(2) option that makes orphaned descendants re-parent to this process
+PR_SET_CHILD_SUBREAPER = 36
+
+
+@dataclass
+class _Session:
+    """Per-connection state shared by the output reader and the SSE stream."""
+
+    # Mcp-Session-Id sent by the client, if any
+    client: str | None = None
+    queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+    queued_bytes: int = 0
+    # Loop time at which the session went over SESSION_QUEUE_BYTES
+    full_since: float | None = None
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Playwright MCP Server",
@@ -26,92 +93,620 @@ app = FastAPI(
     version="0.0.43"
 )
 
-# Configure CORS
+# Configure CORS. ALLOWED_ORIGINS is a comma-separated list of origins;
+# by default any origin may connect without credentials.
+ALLOWED_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("ALLOWED_ORIGINS", "*").split(",")
+    if origin.strip()
+]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=ALLOWED_ORIGINS,
+    allow_credentials=False,
+    allow_methods=("GET", "POST"),
+    allow_headers=("authorization", "content-type", "mcp-protocol-version", "mcp-session-id"),
 )
 
 
 @app.get("/", include_in_schema=False)
-async def serve_index():
+async def serve_index(request: Request):
     """Serve the landing page."""
-    return FileResponse(STATIC_DIR / "index.html")
+    if_none_match = request.headers.get("if-none-match", "")
+    if INDEX_ETAG in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=INDEX_HEADERS)
+    return Response(INDEX_BYTES, media_type="text/html", headers=INDEX_HEADERS)
 
 
-@app.get("/health")
+@app.get("/health", response_model=None)
 async def health():
     """Health check endpoint."""
-    return {"status": "healthy", "service": "playwright-mcp-server"}
+    return Response(content=HEALTH_BODY, media_type="application/json")
 
 
-async def handle_sse_connection(request: Request):
-    """
-    Handle SSE connection by proxying to the Node.js Playwright MCP server.
-    
-    This creates a subprocess running the Node.js MCP server and establishes
-    bidirectional communication via stdin/stdout.
-    """
-    # Find the Node.js MCP server CLI
-    # In production, this will be in the installed package location
+def _resolve_cli_path() -> Path:
+    """Locate the Node.js MCP server CLI, failing fast if it is missing."""
+    # In a source checkout cli.js sits at the repository root
     cli_path = Path(__file__).parent.parent.parent / "cli.js"
-    if not cli_path.exists():
-        # Try alternative location (installed package)
-        import sys
-        for path in sys.path:
-            test_path = Path(path) / "cli.js"
-            if test_path.exists():
-                cli_path = test_path
-                break
-    
-    # Start the Node.js MCP server as a subprocess
-    # Use headless mode and appropriate options for Databricks Apps
-    cmd = [
+    if cli_path.exists():
+        return cli_path
+
+    # Try alternative location (installed package)
+    for path in sys.path:
+        test_path = Path(path) / "cli.js"
+        if test_path.exists():
+            return test_path
+
+    raise RuntimeError(
+        "Could not find the Playwright MCP cli.js next to the package or on sys.path"
+    )
+
+
+# Resolved once at import so connections never touch the filesystem for it
+CLI_PATH = _resolve_cli_path()
+
+
+def _build_mcp_command() -> list[str]:
+    """Build the command line used to launch the Node.js MCP server."""
+    # Use headless mode and appropriate options for Databricks Apps.
+    # No --port is passed so the server speaks JSON-RPC over stdin/stdout.
+    return [
         "node",
-        str(cli_path),
+        str(CLI_PATH),
         "--headless",
         "--browser", "chromium",
         "--no-sandbox",
-        "--port", "0"  # stdin/stdout mode
     ]
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    """Read one newline-terminated frame, even if it exceeds the buffer limit."""
+    chunks = []
+    while True:
+        try:
+            chunks.append(await reader.readuntil(b"\n"))
+            return b"".join(chunks)
+        except asyncio.LimitOverrunError as e:
+            chunks.append(await reader.readexactly(e.consumed))
+        except asyncio.IncompleteReadError as e:
+            # EOF: return whatever is left (empty once the stream is drained).
+            chunks.append(e.partial)
+            return b"".join(chunks)
+
+
+async def _read_mcp_output(process: asyncio.subprocess.Process):
+    """
+    Demultiplex newline-delimited JSON-RPC frames from the MCP server.
+
+    Each session queue receives ``(frame, answered_id)`` tuples, where
+    answered_id is the client's id for a response and None otherwise.
+    See _deliver for how a session that falls behind is handled.
+    Responses are routed back to the connection that issued the request
+    (restoring the client's original id), and requests from the server go
+    to the most recent GET stream. Progress notifications go to the session
+    that owns the progress token; every other notification is broadcast to
+    all connected sessions.
+    """
+    sessions = app.state.mcp_sessions
+    pending = app.state.mcp_pending
+    progress = app.state.mcp_progress
+    while True:
+        line = await _read_frame(process.stdout)
+        if not line:
+            break
+        try:
+            message = json.loads(line)
+        except ValueError:
+            logger.warning("Discarding non JSON-RPC output from MCP server: %r", line[:200])
+            continue
+
+        route = None
+        if isinstance(message, dict) and "method" not in message:
+            route = pending.pop(message.get("id"), None)
+        if route is not None:
+            progress.pop(message["id"], None)
+            session_id, original_id = route
+            message["id"] = original_id
+            _deliver(session_id, json.dumps(message).encode(), original_id, droppable=False)
+        elif isinstance(message, dict) and message.get("method") == "notifications/progress":
+            # Progress belongs to the session whose request carried the token
+            params = message.get("params")
+            token = params.get("progressToken") if isinstance(params, dict) else None
+            route = progress.get(token) if isinstance(token, int) else None
+            if route is not None:
+                session_id, original_token = route
+                message["params"] = {**params, "progressToken": original_token}
+                _deliver(session_id, json.dumps(message).encode())
+        elif isinstance(message, dict) and "method" in message and "id" in message:
+            # A server-to-client request must be answered by exactly one
+            # client: hand it to the most recent GET stream
+            listeners = app.state.mcp_listeners
+            if listeners:
+                _deliver(listeners[-1], line.rstrip(b"\n"), droppable=False)
+            else:
+                error = {
+                    "jsonrpc": "2.0",
+                    "id": message["id"],
+                    "error": {"code": -32601, "message": "No client is listening for server requests"},
+                }
+                # write() never blocks; draining here could deadlock with the server
+                process.stdin.write(json.dumps(error).encode() + b"\n")
+        else:
+            for session_id in list(sessions):
+                _deliver(session_id, line.rstrip(b"\n"))
+
+    # The server exited: end every open stream.
+    for session_id in list(sessions):
+        _end_session(session_id)
+
+
+async def _drain_stderr(process: asyncio.subprocess.Process):
+    """
+    Log the MCP server's stderr at DEBUG level until it closes.
+
+    Playwright and Chromium log verbosely; if the pipe were left unread the
+    server would block once its buffer filled.
+    """
+    while True:
+        line = await _read_frame(process.stderr)
+        if not line:
+            break
+        logger.debug("MCP server: %s", line.decode(errors="replace").rstrip())
+
+
+def _become_subreaper():
+    """
+    Make this process adopt orphaned descendants (Linux only).
+
+    Playwright launches each browser detached, in its own process group, so
+    a crashed Node.js server orphans them. As a child subreaper the app
+    inherits those browsers instead of init and can still kill and reap them.
+    """
+    if not sys.platform.startswith("linux"):
+        return
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.prctl(PR_SET_CHILD_SUBREAPER, 1, 0, 0, 0) != 0:
+        logger.warning("Could not become a child subreaper: %s", os.strerror(ctypes.get_errno()))
+
+
+def _child_pids() -> dict[int, list[int]]:
+    """Map each parent pid to its child pids, read from /proc (empty without it)."""
+    children: dict[int, list[int]] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return children
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces; the parent pid is the second
+        # field after its closing parenthesis
+        ppid = int(stat.rpartition(b")")[2].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def _descendant_pids(pid: int) -> list[int]:
+    """Return the pids of every process descended from pid."""
+    children = _child_pids()
+    found, stack = [], [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def _signal_mcp_tree(process: asyncio.subprocess.Process, sig: int):
+    """
+    Send sig to the MCP server and every process descended from this app.
+
+    The app starts no other subprocesses, so its descendants are the server,
+    the browsers it launched (each in its own process group) and any browsers
+    adopted after an earlier server crashed. Signalling the server's process
+    group covers platforms without /proc; that is only done until the server
+    is reaped, after which its pid, and so the group id, may be reused.
+    Failures (the process is gone, or not ours to signal) are ignored.
+    """
+    pids = set(_descendant_pids(os.getpid()))
+    if process.returncode is None:
+        pids.add(process.pid)
+    for pid in pids:
+        try:
+            os.kill(pid, sig)
+        except OSError:
+            pass
+    if process.returncode is None:
+        try:
+            os.killpg(process.pid, sig)
+        except OSError:
+            pass
+
+
+def _reap_adopted(server_pid: int):
+    """
+    Kill and reap the processes this app adopted as a subreaper.
+
+    Blocks until they are gone, so run it in a thread. server_pid is skipped
+    because asyncio reaps the server itself.
+    """
+    for _ in range(10):
+        adopted = [pid for pid in _child_pids().get(os.getpid(), []) if pid != server_pid]
+        if not adopted:
+            return
+        for pid in adopted:
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+
+
+async def _start_mcp_process() -> asyncio.subprocess.Process:
+    """Return the shared MCP server process, starting it if it is not running."""
+    async with app.state.mcp_start_lock:
+        process = app.state.mcp_proc
+        if process is not None and process.returncode is None:
+            return process
+        if process is not None:
+            # The server died; its browsers were re-parented to this app
+            _signal_mcp_tree(process, signal.SIGKILL)
+            await asyncio.to_thread(_reap_adopted, process.pid)
+
+        # Run the server in its own session so signals aimed at the app's
+        # process group do not reach it; the app shuts it down itself
+        process = await asyncio.create_subprocess_exec(
+            *_build_mcp_command(),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=MCP_STREAM_LIMIT,
+            start_new_session=True,
+        )
+        app.state.mcp_proc = process
+        app.state.mcp_pending.clear()
+        app.state.mcp_progress.clear()
+        app.state.mcp_reader_task = asyncio.create_task(_read_mcp_output(process))
+        app.state.mcp_stderr_task = asyncio.create_task(_drain_stderr(process))
+        return process
+
+
+@app.on_event("startup")
+async def start_mcp_server():
+    """Start the shared Node.js MCP server once for the lifetime of the app."""
+    _become_subreaper()
+    app.state.mcp_proc = None
+    app.state.mcp_reader_task = None
+    app.state.mcp_stderr_task = None
+    app.state.mcp_start_lock = asyncio.Lock()
+    app.state.mcp_stdin_lock = asyncio.Lock()
+    app.state.mcp_sessions = {}
+    app.state.mcp_pending = {}
+    # Upstream progress token -> (session_id, original_token); the upstream
+    # token is the upstream id of the request that carried it
+    app.state.mcp_progress = {}
+    # GET sessions in the order they connected
+    app.state.mcp_listeners = []
+    app.state.mcp_next_id = itertools.count(1)
+    await _start_mcp_process()
+
+
+@app.on_event("shutdown")
+async def stop_mcp_server():
+    """Terminate the shared Node.js MCP server and its browsers."""
+    process = app.state.mcp_proc
+    if process is not None:
+        # EOF on stdin lets the stdio server wind down on its own
+        process.stdin.close()
+        _signal_mcp_tree(process, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(process.wait(), MCP_SHUTDOWN_GRACE)
+        except TimeoutError:
+            pass
+        # Kill the server and browsers that ignored SIGTERM, then reap any
+        # browsers that were re-parented to the app
+        _signal_mcp_tree(process, signal.SIGKILL)
+        await process.wait()
+        await asyncio.to_thread(_reap_adopted, process.pid)
+        app.state.mcp_proc = None
+    tasks = [t for t in (app.state.mcp_reader_task, app.state.mcp_stderr_task) if t is not None]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _parse_messages(body: bytes) -> list:
+    """Parse a POST body into a list of JSON-RPC messages, raising ValueError if invalid."""
+    payload = json.loads(body)
+    messages = payload if isinstance(payload, list) else [payload]
+    if not messages:
+        raise ValueError("JSON-RPC batch must not be empty")
+    for message in messages:
+        if not isinstance(message, dict):
+            raise ValueError("JSON-RPC message must be an object")
+        # MCP forbids null request ids; one could never be matched to a response
+        if "method" in message and "id" in message and message["id"] is None:
+            raise ValueError("JSON-RPC request id must not be null")
+    return messages
+
+
+async def _forward_messages(process: asyncio.subprocess.Process, session_id: str, messages: list) -> set:
+    """
+    Write JSON-RPC messages to the MCP server.
+
+    Request ids are rewritten to ids that are unique across sessions so the
+    reader can route each response back to its session, and progress tokens
+    are rewritten the same way. Cancellations are translated to the upstream
+    id of the request they cancel, or dropped if it cannot be identified.
+    Returns the set of original ids that are awaiting a response.
+    """
+    outstanding = set()
+    frames = []
+    for message in messages:
+        if "method" in message and "id" in message:
+            outstanding.add(message["id"])
+            message = _rewrite_request(session_id, message)
+        elif message.get("method") == "notifications/cancelled":
+            message = _rewrite_cancellation(session_id, message)
+            if message is None:
+                continue
+        frames.append(json.dumps(message).encode() + b"\n")
+    if not frames:
+        return outstanding
+
+    async with app.state.mcp_stdin_lock:
+        process.stdin.writelines(frames)
+        await process.stdin.drain()
+    return outstanding
+
+
+def _rewrite_request(session_id: str, message: dict) -> dict:
+    """Register a client request as pending and return it with upstream ids."""
+    upstream_id = next(app.state.mcp_next_id)
+    app.state.mcp_pending[upstream_id] = (session_id, message["id"])
+    message = {**message, "id": upstream_id}
+    params = message.get("params")
+    meta = params.get("_meta") if isinstance(params, dict) else None
+    if isinstance(meta, dict) and "progressToken" in meta:
+        app.state.mcp_progress[upstream_id] = (session_id, meta["progressToken"])
+        message["params"] = {**params, "_meta": {**meta, "progressToken": upstream_id}}
+    return message
+
+
+def _rewrite_cancellation(session_id: str, message: dict) -> dict | None:
+    """
+    Point a client's cancellation at the upstream id of its own request.
+
+    A cancellation usually arrives on a different connection than the request
+    it cancels, so it is matched against the pending requests of every
+    session from the same client (by Mcp-Session-Id). Returns None unless
+    exactly one request matches, so it can never cancel another client's
+    request that happens to share the id.
+    """
+    params = message.get("params")
+    request_id = params.get("requestId") if isinstance(params, dict) else None
+    sessions = app.state.mcp_sessions
+    client = sessions[session_id].client
+    matches = [
+        upstream_id
+        for upstream_id, (owner, original_id) in app.state.mcp_pending.items()
+        if original_id == request_id and sessions[owner].client == client
+    ]
+    if len(matches) != 1:
+        return None
+    return {**message, "params": {**params, "requestId": matches[0]}}
+
+
+def _unregister_session(session_id: str) -> _Session | None:
+    """Stop routing anything to a session and forget its pending requests."""
+    pending = app.state.mcp_pending
+    for upstream_id in [key for key, (owner, _) in pending.items() if owner == session_id]:
+        del pending[upstream_id]
+    progress = app.state.mcp_progress
+    for token in [key for key, (owner, _) in progress.items() if owner == session_id]:
+        del progress[token]
+    if session_id in app.state.mcp_listeners:
+        app.state.mcp_listeners.remove(session_id)
+    return app.state.mcp_sessions.pop(session_id, None)
+
+
+def _close_session(session_id: str):
+    """Unregister a session whose stream is gone and discard its queued frames."""
+    session = _unregister_session(session_id)
+    while session is not None and not session.queue.empty():
+        session.queue.get_nowait()
+
+
+def _end_session(session_id: str):
+    """
+    Unregister a session and tell its stream to finish.
+
+    Frames already queued are kept, so the stream still delivers them before
+    answering any requests left outstanding with an error.
+    """
+    session = _unregister_session(session_id)
+    if session is not None:
+        session.queue.put_nowait(None)
+
+
+def _deliver(session_id: str, frame: bytes, answered_id=None, droppable: bool = True):
+    """
+    Queue a frame for a session without waiting.
+
+    A session over SESSION_QUEUE_BYTES has droppable frames (notifications)
+    discarded; responses and server requests are always queued. A session
+    that stays over the limit for SESSION_FULL_GRACE seconds is ended.
+    """
+    session = app.state.mcp_sessions.get(session_id)
+    if session is None:
+        return
+    now = asyncio.get_running_loop().time()
+    if session.queued_bytes < SESSION_QUEUE_BYTES:
+        session.full_since = None
+    else:
+        if session.full_since is None:
+            session.full_since = now
+        if droppable:
+            return
+
+    session.queue.put_nowait((frame, answered_id))
+    session.queued_bytes += len(frame)
+
+    if session.full_since is not None and now - session.full_since > SESSION_FULL_GRACE:
+        logger.warning("Dropping MCP session %s: client is not reading its stream", session_id)
+        _end_session(session_id)
+
+
+def _error_frame(request_id, message: str) -> bytes:
+    """Encode a JSON-RPC internal error response for request_id."""
+    error = {"jsonrpc": "2.0", "id": request_id, "error": {"code": -32603, "message": message}}
+    return json.dumps(error).encode()
+
+
+async def _wait_for_disconnect(request: Request):
+    """Return once the client that sent request has disconnected."""
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+
+async def _next_item(queue: asyncio.Queue, disconnected: asyncio.Task):
+    """
+    Wait for the next queued item.
+
+    Returns None if the client goes away, or SSE_KEEPALIVE if nothing has
+    arrived within SSE_KEEPALIVE_INTERVAL.
+    """
+    if not queue.empty():
+        return queue.get_nowait()
+    getter = asyncio.create_task(queue.get())
+    try:
+        await asyncio.wait(
+            {getter, disconnected},
+            timeout=SSE_KEEPALIVE_INTERVAL,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+    finally:
+        received = getter.done()
+        if not received:
+            getter.cancel()
+    if received:
+        return getter.result()
+    return None if disconnected.done() else SSE_KEEPALIVE
+
+
+async def handle_sse_connection(request: Request):
+    """
+    Handle SSE connection by proxying to the Node.js Playwright MCP server.
     
-    process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdin=asyncio.subprocess.PIPE,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    
-    async def stream_response():
-        """Stream responses from the MCP server."""
+    All connections share a single MCP server process. Each connection
+    registers its own queue with the output reader; a POST body is forwarded
+    to the server's stdin and its stream ends once every request in it has
+    been answered, while a GET stream stays open for server notifications.
+    """
+    process = await _start_mcp_process()
+
+    # Read and validate the body before registering anything, so a client
+    # that drops mid-upload leaves no state behind
+    messages = None
+    body = await request.body() if request.method == "POST" else b""
+    if body:
+        try:
+            messages = _parse_messages(body)
+        except ValueError:
+            return Response(status_code=400, content="Invalid JSON-RPC payload")
+
+    session_id = uuid.uuid4().hex
+    session = _Session(client=request.headers.get("mcp-session-id"))
+    queue = session.queue
+    app.state.mcp_sessions[session_id] = session
+    if request.method == "GET":
+        app.state.mcp_listeners.append(session_id)
+
+    outstanding = None
+    try:
+        if messages is not None:
+            outstanding = await _forward_messages(process, session_id, messages)
+            if not outstanding:
+                # Only notifications or responses were sent; nothing to stream back.
+                _close_session(session_id)
+                return Response(status_code=202)
+    except BaseException:
+        # e.g. BrokenPipeError from a dead server, or cancellation
+        _close_session(session_id)
+        raise
+
+    async def stream_response() -> AsyncIterator[bytes]:
+        """
+        Stream this session's frames from the MCP server as SSE events.
+
+        Events are batched so a burst of frames costs one ASGI send; batches
+        always end on an event boundary. The stream also ends as soon as
+        the client disconnects, releasing the session's queue.
+        """
+        loop = asyncio.get_running_loop()
+        disconnected = asyncio.create_task(_wait_for_disconnect(request))
+        buf = bytearray()
+        finished = False
         try:
-            # Read from the process stdout and stream to client
-            while True:
-                line = await process.stdout.readline()
-                if not line:
-                    break
-                yield line
+            while not finished:
+                item = await _next_item(queue, disconnected)
+                if item is SSE_KEEPALIVE:
+                    yield SSE_KEEPALIVE
+                    continue
+                deadline = loop.time() + SSE_FLUSH_INTERVAL
+                while True:
+                    if item is None:
+                        # The session was ended; fail any requests still open
+                        for request_id in outstanding or ():
+                            buf += b"data: " + _error_frame(request_id, SESSION_ENDED) + b"\n\n"
+                        finished = True
+                        break
+                    frame, answered_id = item
+                    session.queued_bytes -= len(frame)
+                    buf += b"data: " + frame + b"\n\n"
+                    if outstanding is not None and answered_id is not None:
+                        outstanding.discard(answered_id)
+                        if not outstanding:
+                            finished = True
+                            break
+                    if len(buf) >= SSE_FLUSH_BYTES:
+                        break
+                    if not queue.empty():
+                        item = queue.get_nowait()
+                        continue
+                    try:
+                        item = await asyncio.wait_for(
+                            queue.get(), max(0, deadline - loop.time())
+                        )
+                    except TimeoutError:
+                        break
+                if buf:
+                    yield bytes(buf)
+                    buf.clear()
         finally:
-            # Cleanup
-            if process.returncode is None:
-                process.terminate()
-                await process.wait()
+            disconnected.cancel()
+            # Unregister the session; the shared server keeps running.
+            _close_session(session_id)
     
     return StreamingResponse(
         stream_response(),
-        media_type="text/event-stream",
+        media_type="text/event-stream; charset=utf-8",
+        # Stop nginx-style proxies from buffering the stream. Nagle is
+        # already off: asyncio sets TCP_NODELAY on accepted sockets.
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
         }
     )
 
 
-@app.get("/mcp/sse")
-@app.post("/mcp/sse")
 async def mcp_sse_endpoint(request: Request):
     """
     MCP Server Sent Events endpoint.
@@ -121,8 +716,6 @@ async def mcp_sse_endpoint(request: Request):
     return await handle_sse_connection(request)
 
 
-@app.get("/api/mcp/")
-@app.post("/api/mcp/")
 async def mcp_api_endpoint(request: Request):
     """
     Alternative MCP endpoint path (for compatibility with different clients).
@@ -130,6 +723,16 @@ async def mcp_api_endpoint(request: Request):
     return await handle_sse_connection(request)
 
 
+# The MCP endpoints only take the raw request, so register them as plain
+# Starlette routes and skip FastAPI's dependency and validation machinery.
+app.add_route("/mcp/sse", mcp_sse_endpoint, methods=["GET", "POST"], include_in_schema=False)
+app.add_route("/api/mcp/", mcp_api_endpoint, methods=["GET", "POST"], include_in_schema=False)
+
+
+# Remaining static assets are served straight from disk
+app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+
+
 # For local development
 if __name__ == "__main__":
     import uvicorn
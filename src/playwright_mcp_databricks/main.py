@@ -11,6 +11,17 @@ def main():
         host="0.0.0.0",
         port=8000,
         reload=False,
+        # uvicorn picks uvloop and httptools automatically when the
+        # "speedups" extra is installed
+        loop="auto",
+        http="auto",
+        # Browser state lives in the one Node.js MCP server this process
+        # owns, so stateful MCP sessions need every request in one worker
+        workers=1,
+        # Idle HTTP keep-alive; open SSE streams send their own keepalives
+        timeout_keep_alive=75,
+        backlog=2048,
+        log_level="warning",
     )
 
 
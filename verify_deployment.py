@@ -5,33 +5,57 @@ Deployment verification script for Playwright MCP Server on Databricks Apps.
 This script helps verify that your deployment is correctly configured before
 deploying to Databricks Apps.
 """
+import argparse
+import shutil
 import sys
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import json
 
+# Parsed YAML is cached here between runs
+CACHE_DIR = Path.home() / ".cache" / "playwright-mcp-databricks"
+
+
+COLORS = {
+    "info": "\033[94m",
+    "success": "\033[92m",
+    "warning": "\033[93m",
+    "error": "\033[91m",
+}
+RESET = "\033[0m"
+PREFIX = {
+    "info": "ℹ",
+    "success": "✓",
+    "warning": "⚠",
+    "error": "✗",
+}
+
+# Output is collected here and written out once per section by flush()
+_buf: list[str] = []
+
 
 def print_status(message: str, status: str = "info"):
-    """Print a status message with color."""
-    colors = {
-        "info": "\033[94m",
-        "success": "\033[92m",
-        "warning": "\033[93m",
-        "error": "\033[91m",
-    }
-    reset = "\033[0m"
-    prefix = {
-        "info": "ℹ",
-        "success": "✓",
-        "warning": "⚠",
-        "error": "✗",
-    }
-    print(f"{colors[status]}{prefix[status]} {message}{reset}")
-
-
-def check_file_exists(filepath: Path, description: str) -> bool:
-    """Check if a required file exists."""
-    if filepath.exists():
+    """Queue a status message with color."""
+    _buf.append(f"{COLORS[status]}{PREFIX[status]} {message}{RESET}\n")
+
+
+def print_line(text: str = ""):
+    """Queue a plain line of output."""
+    _buf.append(f"{text}\n")
+
+
+def flush():
+    """Write all queued output to stdout in a single call."""
+    sys.stdout.write("".join(_buf))
+    _buf.clear()
+    sys.stdout.flush()
+
+
+def check_file_exists(filepath: Path, description: str, exists: bool) -> bool:
+    """Report whether a required file exists."""
+    if exists:
         print_status(f"{description}: {filepath}", "success")
         return True
     else:
@@ -39,35 +63,130 @@ def check_file_exists(filepath: Path, description: str) -> bool:
         return False
 
 
-def check_command_available(command: str) -> bool:
-    """Check if a command is available in PATH."""
+def run_checks(checks: list[tuple]) -> list:
+    """Run independent (callable, args) checks concurrently, keeping their order."""
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        futures = [pool.submit(func, *args) for func, args in checks]
+        return [future.result() for future in futures]
+
+
+def locate_command(command: str, with_version: bool = False) -> str | None:
+    """Return where a command lives in PATH (or its version), or None."""
+    path = shutil.which(command)
+    if path is None or not with_version:
+        return path
     try:
         result = subprocess.run(
-            [command, "--version"],
+            [path, "--version"],
             capture_output=True,
             text=True,
             timeout=5
         )
-        if result.returncode == 0:
-            version = result.stdout.strip().split("\n")[0]
-            print_status(f"{command} is available: {version}", "success")
-            return True
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        pass
+    except (subprocess.TimeoutExpired, OSError):
+        return path
+    if result.returncode == 0 and result.stdout.strip():
+        return result.stdout.strip().split("\n")[0]
+    return path
+
+
+def check_command_available(command: str, location: str | None) -> bool:
+    """Report whether a command was found by locate_command."""
+    if location is not None:
+        print_status(f"{command} is available: {location}", "success")
+        return True
     
     print_status(f"{command} is not available", "error")
     return False
 
 
-def main():
+def run_streaming(cmd: list[str], cwd: Path, timeout: float) -> int:
+    """
+    Run a command, echoing its combined stdout/stderr as it is produced.
+
+    Returns the exit code. The command is killed and subprocess.TimeoutExpired
+    raised if it runs for longer than timeout seconds.
+    """
+    # Queued output must come first; the command's lines are written live
+    flush()
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        cwd=cwd
+    )
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    try:
+        with process.stdout:
+            for line in process.stdout:
+                print(f"  {line.rstrip()}")
+        returncode = process.wait()
+    finally:
+        timer.cancel()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    return returncode
+
+
+def load_bundle_config(path: Path) -> dict:
+    """
+    Parse a bundle YAML file, reusing a JSON cache while the file is unchanged.
+
+    The cache lives in CACHE_DIR and is keyed on the file's path, size and
+    mtime. Raises ImportError if PyYAML is needed but not installed.
+    """
+    stat = path.stat()
+    key = {"path": str(path.resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    cache_file = CACHE_DIR / f"{path.name}.json"
+    try:
+        cached = json.loads(cache_file.read_text(encoding="utf-8"))
+        if cached["key"] == key:
+            return cached["config"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    import yaml
+    try:
+        from yaml import CSafeLoader as Loader
+    except ImportError:
+        from yaml import SafeLoader as Loader
+    with open(path, "r") as f:
+        config = yaml.load(f, Loader=Loader)
+
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(json.dumps({"key": key, "config": config}), encoding="utf-8")
+    except (OSError, TypeError, ValueError):
+        # Not cacheable (e.g. YAML dates); the next run simply parses again
+        pass
+    return config
+
+
+def main(argv: list[str] | None = None):
     """Run deployment verification checks."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--with-versions",
+        action="store_true",
+        help="run each required command with --version and report it",
+    )
+    args = parser.parse_args(argv)
+
     print_status("Starting deployment verification...", "info")
-    print()
+    print_line()
+    flush()
     
     all_checks_passed = True
     
-    # Check required files
-    print_status("Checking required files...", "info")
     root = Path(__file__).parent
     required_files = [
         (root / "pyproject.toml", "Python project configuration"),
@@ -78,50 +197,57 @@ def main():
         (root / "cli.js", "MCP CLI entry point"),
         (root / "index.js", "MCP server module"),
     ]
-    
-    for filepath, description in required_files:
-        if not check_file_exists(filepath, description):
-            all_checks_passed = False
-    print()
-    
-    # Check Python source files
-    print_status("Checking Python source files...", "info")
     src_files = [
         (root / "src" / "playwright_mcp_databricks" / "__init__.py", "Package init"),
         (root / "src" / "playwright_mcp_databricks" / "app.py", "FastAPI application"),
         (root / "src" / "playwright_mcp_databricks" / "main.py", "Main entry point"),
         (root / "src" / "playwright_mcp_databricks" / "static" / "index.html", "Landing page"),
     ]
+    required_commands = ["node", "npm", "uv", "databricks"]
+
+    # The file and command probes are independent; run them all up front
+    # and report the results section by section in a stable order.
+    results = run_checks(
+        [(Path.exists, (filepath,)) for filepath, _ in required_files + src_files]
+        + [(locate_command, (command, args.with_versions)) for command in required_commands]
+    )
+    required_found = results[:len(required_files)]
+    src_found = results[len(required_files):len(required_files) + len(src_files)]
+    locations = results[len(required_files) + len(src_files):]
+
+    # Check required files
+    print_status("Checking required files...", "info")
+    for (filepath, description), exists in zip(required_files, required_found):
+        if not check_file_exists(filepath, description, exists):
+            all_checks_passed = False
+    print_line()
+    flush()
     
-    for filepath, description in src_files:
-        if not check_file_exists(filepath, description):
+    # Check Python source files
+    print_status("Checking Python source files...", "info")
+    for (filepath, description), exists in zip(src_files, src_found):
+        if not check_file_exists(filepath, description, exists):
             all_checks_passed = False
-    print()
+    print_line()
+    flush()
     
     # Check required commands
     print_status("Checking required commands...", "info")
-    required_commands = ["node", "npm", "uv", "databricks"]
-    
-    for command in required_commands:
-        if not check_command_available(command):
+    for command, location in zip(required_commands, locations):
+        if not check_command_available(command, location):
             all_checks_passed = False
             if command == "databricks":
                 print_status("Install with: pip install databricks-cli", "warning")
             elif command == "uv":
                 print_status("Install with: pip install uv", "warning")
-    print()
+    print_line()
+    flush()
     
     # Test build process
     print_status("Testing build process...", "info")
     try:
-        result = subprocess.run(
-            ["uv", "build", "--wheel"],
-            capture_output=True,
-            text=True,
-            timeout=120,
-            cwd=root
-        )
-        if result.returncode == 0:
+        returncode = run_streaming(["uv", "build", "--wheel"], cwd=root, timeout=120)
+        if returncode == 0:
             print_status("Build successful", "success")
             
             # Check .build directory
@@ -133,26 +259,25 @@ def main():
                 contents = list(build_dir.iterdir())
                 print_status(f"Build contains {len(contents)} files:", "info")
                 for item in sorted(contents):
-                    print(f"  - {item.name}")
+                    print_line(f"  - {item.name}")
             else:
                 print_status(".build directory not found", "error")
                 all_checks_passed = False
         else:
-            print_status(f"Build failed: {result.stderr}", "error")
+            print_status(f"Build failed with exit code {returncode}", "error")
             all_checks_passed = False
     except subprocess.TimeoutExpired:
         print_status("Build timed out", "error")
         all_checks_passed = False
     except FileNotFoundError:
         print_status("uv command not found - skipping build test", "warning")
-    print()
+    print_line()
+    flush()
     
     # Check databricks.yml structure
     print_status("Validating databricks.yml...", "info")
     try:
-        import yaml
-        with open(root / "databricks.yml", "r") as f:
-            config = yaml.safe_load(f)
+        config = load_bundle_config(root / "databricks.yml")
         
         if "bundle" in config and "name" in config["bundle"]:
             print_status(f"Bundle name: {config['bundle']['name']}", "success")
@@ -171,20 +296,23 @@ def main():
     except Exception as e:
         print_status(f"Error validating databricks.yml: {e}", "error")
         all_checks_passed = False
-    print()
+    print_line()
+    flush()
     
     # Summary
-    print("=" * 60)
+    print_line("=" * 60)
     if all_checks_passed:
         print_status("All checks passed! Ready to deploy.", "success")
-        print()
+        print_line()
         print_status("Next steps:", "info")
-        print("  1. Authenticate: databricks auth login --profile your-profile")
-        print("  2. Deploy: databricks bundle deploy -p your-profile")
-        print("  3. Run: databricks bundle run playwright-mcp-on-apps -p your-profile")
+        print_line("  1. Authenticate: databricks auth login --profile your-profile")
+        print_line("  2. Deploy: databricks bundle deploy -p your-profile")
+        print_line("  3. Run: databricks bundle run playwright-mcp-on-apps -p your-profile")
+        flush()
         return 0
     else:
         print_status("Some checks failed. Please fix the issues above.", "error")
+        flush()
         return 1
 
 